@@ -27,11 +27,10 @@ __docformat__ = 'restructuredtext en'
 # pylint: disable=line-too-long
 # pylint: disable=consider-using-f-string
 
-from typing import Tuple, Dict, Union, Generator
+from typing import Tuple, Dict, Union, ItemsView
+from functools import lru_cache
 import re
 import logging
-import pprint
-import warnings
 try:
     import gi
     gi.require_version('Gtk', '3.0')
@@ -48,9 +47,14 @@ from UPSmodules import UPSmodule
 from UPSmodules.UPSKeys import MibGroup
 
 ColorDict = Dict[str, str]
-GuiCompDict = Dict[str, Dict[str, Dict[str, any]]]
+GuiCompDict = Dict[str, Dict[str, 'GuiCell']]
 LOGGER = logging.getLogger('ups-utils')
 PATTERNS = UT_CONST.PATTERNS
+_HEX_RE = PATTERNS['HEXRGB'] if isinstance(PATTERNS['HEXRGB'], re.Pattern) else re.compile(PATTERNS['HEXRGB'])
+_QUOTE_RE = re.compile(r"'")
+# Data values treated as no data, and items flagged as Unresponsive when data is missing.
+_EMPTY_VALUES = frozenset({'-1', None, '', 'No data', 'None'})
+_UNRESPONSIVE_ITEMS = frozenset({'mib_ups_name', 'mib_system_status'})
 
 
 def get_color(value: str) -> str:
@@ -63,33 +67,66 @@ def get_color(value: str) -> str:
     return GuiProps.color_name_to_hex(value)
 
 
+@lru_cache(maxsize=None)
+def _hex_to_rgba(value: str) -> Tuple[Union[float, int], ...]:
+    """
+    Return rgba tuple for give hex color name.  Results are cached, since the project
+    color set is small and fixed.
+
+    :param value: hex color value as string
+    :return:  rgba tuple
+
+    .. note:: Code copied from Stack Overflow
+    """
+    if not _HEX_RE.fullmatch(value):
+        raise ValueError('Invalid hex color format in {}'.format(value))
+    rgb = int(value[-6:], 16)
+    return (rgb >> 16) / 255.0, ((rgb >> 8) & 0xFF) / 255.0, (rgb & 0xFF) / 255.0, 1.0
+
+
+class GuiCell:
+    """ Gui elements and current data value for a single monitor table cell.
+    """
+    __slots__ = ('label', 'box', 'box_name', 'data')
+
+    def __init__(self, label: any = None, box: any = None, box_name: Union[str, None] = None):
+        self.label: any = label
+        self.box: any = box
+        self.box_name: Union[str, None] = box_name
+        # Data is seeded with None so the first refresh always writes the label text.
+        self.data: Union[str, None] = None
+
+    def __repr__(self) -> str:
+        return 'GuiCell(box_name={}, data={})'.format(self.box_name, self.data)
+
+
 class GuiComp:
     """ Object to represent Gui component and associate with data dict.
     """
     def __init__(self, data_dict: UPSmodule.UpsList, max_width: int):
-        # {uuid: {name: {'label': label, 'box': box, 'box_name': box_name 'data': data}}}
+        # {uuid: {name: GuiCell}}
         self.gc: GuiCompDict = {}
         self.data_dict: UPSmodule.UpsList = data_dict
         self.max_width: int = max_width
-        self.update_time: dict = {'update_time': {
-            'label': None,
-            'box': None,
-            'box_name': None,
-            'data': UT_CONST.now(ltz=UT_CONST.use_ltz, as_string=True)}}
+        self.update_time: GuiCell = GuiCell(box_name='update_time')
+        self.update_time.data = UT_CONST.now(ltz=UT_CONST.use_ltz, as_string=True)
+        # Per-uuid (name, cell) pairs with static items filtered out, built lazily per uuid
+        # so the refresh loop carries no membership tests.  Invalidated by add().
+        self._dynamic_items: Dict[str, tuple] = {}
 
     def __str__(self) -> str:
-        return re.sub(r'\'', '\"', pprint.pformat(self.gc, indent=2, width=120))
+        import pprint
+        return _QUOTE_RE.sub('\"', pprint.pformat(self.gc, indent=2, width=120))
 
     def __repr__(self) -> str:
         return self.__str__()
 
-    def items(self) -> Generator[Union[str, dict], None, None]:
+    def items(self) -> ItemsView[str, dict]:
         """ Get uuid, gui component pairs from a gui component object.
 
-        :return:  uuid, gc pair
+        :return:  uuid, gc pairs
         """
-        for key, value in self.gc.items():
-            yield key, value
+        return self.gc.items()
 
     def add(self, uuid: Union[str, None], name: str, label: any, box: any = None, box_name: Union[str, None] = None):
         """ Add a new gui element and associate data source
@@ -102,25 +139,38 @@ class GuiComp:
         """
         if not uuid:
             if name == 'update_time':
-                self.update_time['label'] = label
-                self.update_time['box'] = box
-                self.update_time['box_name'] = box_name
-                self.update_time['data'] = UT_CONST.now(ltz=UT_CONST.use_ltz, as_string=True)
+                self.update_time.label = label
+                self.update_time.box = box
+                self.update_time.box_name = box_name
+                self.update_time.data = UT_CONST.now(ltz=UT_CONST.use_ltz, as_string=True)
             return
 
-        if uuid not in self.gc:
-            self.gc.update({uuid: {name: {'label': label, 'box': box, 'box_name': box_name, 'data': '---'}}})
+        cell = GuiCell(label, box, box_name)
+        gc_uuid = self.gc.get(uuid)
+        if gc_uuid is None:
+            self.gc[uuid] = {name: cell}
         else:
-            self.gc[uuid].update({name: {'label': label, 'box': box, 'box_name': box_name, 'data': '---'}})
+            gc_uuid[name] = cell
+        self._dynamic_items.pop(uuid, None)
 
-    def all_refresh_gui_data(self, skip_static: bool = False) -> None:
+    def all_refresh_gui_data(self, skip_static: bool = False, container: any = None) -> None:
         """ Refresh all gui elements with data from the data dict.
 
         :param skip_static:  Do not update static items if True
+        :param container:  Optional Gtk container holding the gui elements.  Child notify is
+                           frozen for the duration of the batch so Gtk coalesces relayout work.
         """
-        self.update_time['data'] = UT_CONST.now(ltz=UT_CONST.use_ltz, as_string=True)
-        for uuid in self.data_dict.uuids():
-            self.refresh_gui_data(uuid, skip_static)
+        self.update_time.data = UT_CONST.now(ltz=UT_CONST.use_ltz, as_string=True)
+        gui_comp = self.gc
+        data_dict = self.data_dict
+        if container: container.freeze_child_notify()
+        try:
+            for uuid in tuple(data_dict.uuids()):
+                if uuid in gui_comp:
+                    self._refresh_one(self._item_pairs(uuid, skip_static), data_dict[uuid])
+        finally:
+            if container: container.thaw_child_notify()
+        self.update_time.label.set_markup('<big><b> {} </b></big>'.format(self.update_time.data))
 
     def refresh_gui_data(self, uuid: str, skip_static: bool = False) -> None:
         """ Refresh gui element with data from the data dict.
@@ -128,25 +178,60 @@ class GuiComp:
         :param skip_static:  Do not update static items if True
         :param uuid:  Key for first level of gui and data dicts.
         """
-        for item_name, item_dict in self.gc[uuid].items():
-            if skip_static:
-                if item_name in UPSmodule.UpsComm.all_mib_cmd_names[MibGroup.static]:
-                    continue
+        try:
+            data_uuid = self.data_dict[uuid]
+        except KeyError:
+            data_uuid = {}
+        self._refresh_one(self._item_pairs(uuid, skip_static), data_uuid)
+        self.update_time.label.set_markup('<big><b> {} </b></big>'.format(self.update_time.data))
+
+    def _item_pairs(self, uuid: str, skip_static: bool) -> tuple:
+        """ Get the (name, cell) pairs to be refreshed for the given uuid.
+
+        Pairs with static items filtered out are cached per uuid, so the static membership
+        test is paid once instead of on every refresh.
+
+        :param uuid:  Key for first level of gui and data dicts.
+        :param skip_static:  Do not include static items if True
+        :return:  Tuple of (name, cell) pairs
+        """
+        if not skip_static:
+            return tuple(self.gc[uuid].items())
+        item_pairs = self._dynamic_items.get(uuid)
+        if item_pairs is None:
+            static_names = UPSmodule.UpsComm.all_mib_cmd_names[MibGroup.static]
+            item_pairs = tuple(pair for pair in self.gc[uuid].items() if pair[0] not in static_names)
+            self._dynamic_items[uuid] = item_pairs
+        return item_pairs
+
+    def _refresh_one(self, item_pairs: tuple, data_uuid: dict) -> None:
+        """ Refresh the gui elements of a single ups from its already resolved items.
+
+        :param item_pairs:  (name, cell) pairs to be refreshed
+        :param data_uuid:  Data dict for the same uuid
+        """
+        max_width = self.max_width
+        for item_name, cell in item_pairs:
             try:
-                data_value = self.data_dict[uuid][item_name]
+                data_value = data_uuid[item_name]
             except KeyError:
                 data_value = None
-            if data_value in {'-1', None, '', 'No data', 'None'}:
-                data_value = 'Unresponsive' if item_name in {'mib_ups_name', 'mib_system_status'} else '---'
-            data_value = str(data_value)[:self.max_width]
-            item_dict['label'].set_text(data_value)
-            self.gc[uuid][item_name]['data'] = data_value
-        self.update_time['label'].set_markup('<big><b> {} </b></big>'.format(self.update_time['data']))
+            if data_value in _EMPTY_VALUES:
+                data_value = 'Unresponsive' if item_name in _UNRESPONSIVE_ITEMS else '---'
+            if type(data_value) is not str:
+                data_value = str(data_value)
+            if len(data_value) > max_width:
+                data_value = data_value[:max_width]
+            if data_value == cell.data:
+                continue
+            cell.label.set_text(data_value)
+            cell.data = data_value
 
 
 class GuiProps:
     """ Class to manage style properties of Gtk widgets.
     """
+    _default_provider: any = None
     _colors: ColorDict = {'white':     '#FFFFFF',
                           'white_off': '#FCFCFC',
                           'white_pp':  '#F0E5D3',
@@ -182,6 +267,10 @@ class GuiProps:
                           'slate_md':  '#80808d',
                           'slate_dk':  '#5D5D67',
                           'slate_vdk': '#3A3A40'}
+    # Precomputed rgba tuples for the project colors, so no hex parsing is needed at run time.
+    _colors_rgba: Dict[str, Tuple[Union[float, int], ...]] = {
+        name: (int(hex_str[1:3], 16) / 255.0, int(hex_str[3:5], 16) / 255.0, int(hex_str[5:7], 16) / 255.0, 1.0)
+        for name, hex_str in _colors.items()}
 
     @staticmethod
     def color_name_to_hex(value: str) -> str:
@@ -191,75 +280,65 @@ class GuiProps:
         :param value: Color name
         :return: Color hex code
         """
-        if value not in GuiProps._colors.keys():
-            raise ValueError('Invalid color name {} not in {}'.format(value, GuiProps._colors))
-        return GuiProps._colors[value]
+        try:
+            return GuiProps._colors[value]
+        except KeyError:
+            raise ValueError('Invalid color name {} not in {}'.format(value, GuiProps._colors)) from None
 
-    @staticmethod
-    def color_name_to_rgba(value: str) -> Tuple[Union[float, int], ...]:
+    @classmethod
+    def color_name_to_rgba(cls, value: str) -> Tuple[Union[float, int], ...]:
         """
-        Convert the given color name to a color tuple.  The given color string mus exist in the project
-        color list.
+        Convert the given color name to a color tuple.  The given color string must exist in the
+        project color list.
 
         :param value:  Color name
         :return: Color tuple
         """
-        if value not in GuiProps._colors.keys():
-            raise ValueError('Invalid color name {} not in {}'.format(value, GuiProps._colors))
-        return GuiProps.hex_to_rgba(GuiProps._colors[value])
+        try:
+            return cls._colors_rgba[value]
+        except KeyError:
+            raise ValueError('Invalid color name {} not in {}'.format(value, cls._colors)) from None
+
+    # Cached module-level implementation re-exposed as a staticmethod.
+    hex_to_rgba = staticmethod(_hex_to_rgba)
+
+    # Setters for supported Gtk properties, applied in order for given keyword arguments.
+    _prop_setters: tuple = (
+        ('top',         lambda item, value: item.set_property('margin-top', value)),
+        ('bottom',      lambda item, value: item.set_property('margin-bottom', value)),
+        ('right',       lambda item, value: item.set_property('margin-right', value)),
+        ('left',        lambda item, value: item.set_property('margin-left', value)),
+        ('width',       lambda item, value: item.set_property('width-request', value)),
+        ('width_max',   lambda item, value: item.set_max_width_chars(value)),
+        ('width_chars', lambda item, value: item.set_width_chars(value)),
+        ('max_length',  lambda item, value: item.set_max_length(value)))
 
     @staticmethod
-    def hex_to_rgba(value: str) -> Tuple[Union[float, int], ...]:
+    def set_gtk_prop(gui_item, **kwargs) -> None:
         """
-        Return rgba tuple for give hex color name.
-
-        :param value: hex color value as string
-        :return:  rgba tuple
-
-        .. note:: Code copied from Stack Overflow
-        """
-        if not re.fullmatch(PATTERNS['HEXRGB'], value):
-            raise ValueError('Invalid hex color format in {}'.format(value))
-        value = value.lstrip('#')
-        if len(value) != 6:
-            raise ValueError('Invalid hex color format in {}'.format(value))
-        (r_1, g_1, b_1, a_1) = tuple(int(value[i:i + 2], 16) for i in range(0, 6, 2)) + (1,)
-        (r_1, g_1, b_1, a_1) = (r_1 / 255.0, g_1 / 255.0, b_1 / 255.0, a_1)
-        return tuple([r_1, g_1, b_1, a_1])
-
-    @staticmethod
-    def set_gtk_prop(gui_item, top: int = None, bottom: int = None, right: int = None,
-                     left: int = None, width: int = None, width_chars: int = None, width_max: int = None,
-                     max_length: int = None, align: tuple = None, xalign: float = None) -> None:
-        """
-        Set properties of Gtk objects.
+        Set properties of Gtk objects.  Supported keyword arguments are top, bottom, right, and
+        left margins, width (width-request), width_chars, width_max, max_length, align, and
+        xalign.  Only given properties are set; None values are skipped.
 
         :param gui_item: Gtk object
-        :param top: Top margin
-        :param bottom: Bottom margin
-        :param right: Right margin
-        :param left: Left margin
-        :param width: Width of request field
-        :param width_chars: Width of label
-        :param width_max: Max Width of object
-        :param max_length: max length of entry
-        :param align: Alignment parameters
-        :param xalign: X Alignment parameter
+        :param kwargs: Properties to be set
         """
-        if top: gui_item.set_property('margin-top', top)
-        if bottom: gui_item.set_property('margin-bottom', bottom)
-        if right: gui_item.set_property('margin-right', right)
-        if left: gui_item.set_property('margin-left', left)
-        if width: gui_item.set_property('width-request', width)
-        if width_max: gui_item.set_max_width_chars(width_max)
-        if width_chars: gui_item.set_width_chars(width_chars)
-        if max_length: gui_item.set_max_length(max_length)
+        for prop_name, setter in GuiProps._prop_setters:
+            value = kwargs.get(prop_name)
+            if value is not None:
+                setter(gui_item, value)
+        xalign = kwargs.get('xalign')
+        align = kwargs.get('align')
+        if xalign is None and align is None:
+            return
+        # Only snapshot/restore the warnings filter when the deprecated alignment calls are used.
+        import warnings
         with warnings.catch_warnings():
             warnings.filterwarnings('ignore', category=DeprecationWarning)
-            if xalign:
+            if xalign is not None:
                 # FIXME - This is deprecated in latest Gtk, need to use halign
                 gui_item.set_alignment(xalign=xalign)
-            if align:
+            if align is not None:
                 # FIXME - This is deprecated in latest Gtk, need to use halign
                 gui_item.set_alignment(*align)
 
@@ -270,9 +349,20 @@ class GuiProps:
 
         :param css_str: A valid css format string.
         """
-        css_list = []
-        if css_str is None:
-            # Initialize formatting colors.
+        screen = Gdk.Screen.get_default()
+        style_context = Gtk.StyleContext()
+
+        if css_str is not None:
+            if LOGGER.isEnabledFor(logging.INFO):
+                LOGGER.info('css %s', css_str)
+            provider = Gtk.CssProvider()
+            provider.load_from_data(css_str.encode('utf-8'))
+            style_context.add_provider_for_screen(screen, provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
+            return
+
+        if cls._default_provider is None:
+            # Initialize formatting colors.  Styles are static, so the provider is built once and reused.
+            css_list = []
             css_list.append("grid { background-image: image(%s); }" % cls._colors['gray70'])
             css_list.append("#light_grid { background-image: image(%s); }" % cls._colors['gray20'])
             css_list.append("#dark_grid { background-image: image(%s); }" % cls._colors['gray70'])
@@ -304,15 +394,12 @@ class GuiProps:
             # Below format does not work.
             css_list.append("entry:selected { background-image: image(%s); color: %s; }" %
                             (cls._colors['yellow'], cls._colors['white']))
-        else:
-            css_list.append(css_str)
-        LOGGER.info('css %s', css_list)
-
-        screen = Gdk.Screen.get_default()
-
-        for css_item in css_list:
+            if LOGGER.isEnabledFor(logging.INFO):
+                LOGGER.info('css %s', css_list)
+            # One provider holding all default rules costs a single css cascade pass to apply.
             provider = Gtk.CssProvider()
-            css = css_item.encode('utf-8')
-            provider.load_from_data(css)
-            style_context = Gtk.StyleContext()
-            style_context.add_provider_for_screen(screen, provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)
+            provider.load_from_data('\n'.join(css_list).encode('utf-8'))
+            cls._default_provider = provider
+
+        style_context.add_provider_for_screen(screen, cls._default_provider,
+                                              Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION)